@@ -5,9 +5,9 @@ Generates realistic agriculture data with intentional quality issues for testing
 
 import os
 import random
-import uuid
+import numpy as np
 import pyarrow as pa
-import pyarrow.parquet as pq
+import pyarrow.dataset as ds
 from datetime import datetime
 
 # Configuration
@@ -15,6 +15,54 @@ YEARS = [2023, 2024, 2025]
 CROPS = ["corn", "soybeans", "wheat"]
 FIPS_CODES = [f"{i:05d}" for i in range(1001, 1011)]  # 10 counties
 PARCELS_PER_COMBO = (10, 15)  # Range of parcels per county/crop/year
+YIELD_UNITS = "bushels"
+AREA_UNITS = "acres"
+ROW_GROUP_ROWS = 50_000  # Max rows per Parquet row group
+MAX_ROWS_PER_FILE = 10_000_000
+
+# Parquet encoding applied to every partition file
+PARQUET_WRITE_OPTIONS = {
+    "compression": "zstd",
+    "compression_level": 3,
+    "data_page_size": 1 << 20,
+}
+
+# Values of each dictionary-encoded column. Generators store these columns
+# as integer positions into the lists below rather than as strings.
+DICTIONARY_VALUES = {
+    "crop_name": CROPS,
+    "fips_cd": FIPS_CODES,
+    "yield_units": [YIELD_UNITS],
+    "area_units": [AREA_UNITS],
+}
+
+# Generators return one set of columns spanning every year, tagged with
+# harvest_year; the dataset writer splits rows into partitions on it.
+HARVEST_YEAR_FIELD = pa.field("harvest_year", pa.int32())
+HARVEST_YEAR_PARTITIONING = ds.partitioning(
+    pa.schema([HARVEST_YEAR_FIELD]), flavor="hive"
+)
+
+# Low-cardinality strings are dictionary-encoded and measurements stored as
+# float32 so Arrow builds typed buffers directly instead of inferring types.
+# The single-valued unit columns are also recorded as schema metadata.
+YIELD_SCHEMA = pa.schema([
+    ("crop_name", pa.dictionary(pa.int16(), pa.string())),
+    ("land_id", pa.string()),
+    ("fips_cd", pa.dictionary(pa.int16(), pa.string())),
+    ("yield", pa.float32()),
+    ("yield_units", pa.dictionary(pa.int8(), pa.string())),
+    ("land_area", pa.float32()),
+    ("planted_area", pa.float32()),
+    ("area_units", pa.dictionary(pa.int8(), pa.string())),
+], metadata={"yield_units": YIELD_UNITS, "area_units": AREA_UNITS})
+
+ABANDONMENT_SCHEMA = pa.schema([
+    ("crop_name", pa.dictionary(pa.int16(), pa.string())),
+    ("fips_cd", pa.dictionary(pa.int16(), pa.string())),
+    ("abandoned_area", pa.float32()),
+    ("abandonment_percent", pa.float32()),
+])
 
 # Realistic yield ranges by crop (bushels per acre)
 YIELD_RANGES = {
@@ -30,88 +78,106 @@ ABANDONMENT_RANGES = {
     "wheat": (3, 12),
 }
 
-random.seed(42)  # For reproducibility
+_rng = random.Random(42)  # Seeded generator for scalar draws, for reproducibility
+
 
+def uniform_hundredths(low, high):
+    """Draw a value in [low, high] on a 0.01 grid without calling round()."""
+    return _rng.randint(int(low * 100), int(high * 100)) / 100
 
-def generate_land_id():
-    """Generate a unique land parcel ID."""
-    return f"PARCEL-{uuid.uuid4().hex[:8].upper()}"
+
+def synthesize_parcels(rng, num_parcels, yield_low, yield_high):
+    """Draw land area, planted area and yield arrays for a batch of parcels."""
+    land_area = np.round(rng.uniform(80, 500, num_parcels), 2)
+    planted_area = np.round(land_area * rng.uniform(0.7, 0.95, num_parcels), 2)
+    yield_val = np.round(rng.uniform(yield_low, yield_high, num_parcels), 2)
+    return land_area, planted_area, yield_val
 
 
 def generate_crop_yield_data():
-    """Generate crop yield data with intentional quality issues."""
-    records_by_year = {year: [] for year in YEARS}
+    """Generate crop yield columns for all years with intentional quality issues."""
+    rng = np.random.default_rng(42)
     
-    duplicate_candidates = []  # Track records for potential duplication
+    combo_shape = (len(YEARS), len(FIPS_CODES), len(CROPS))
+    parcel_counts = rng.integers(
+        *PARCELS_PER_COMBO, size=combo_shape, endpoint=True
+    ).ravel()
+    year_idx, fips_idx, crop_idx = np.indices(combo_shape).reshape(3, -1)
+    num_rows = int(parcel_counts.sum())
     
-    for year in YEARS:
-        for fips_cd in FIPS_CODES:
-            for crop in CROPS:
-                num_parcels = random.randint(*PARCELS_PER_COMBO)
-                yield_range = YIELD_RANGES[crop]
-                
-                for _ in range(num_parcels):
-                    land_id = generate_land_id()
-                    land_area = round(random.uniform(80, 500), 2)
-                    planted_area = round(land_area * random.uniform(0.7, 0.95), 2)
-                    yield_val = round(random.uniform(*yield_range), 2)
-                    
-                    record = {
-                        "crop_name": crop,
-                        "land_id": land_id,
-                        "fips_cd": fips_cd,
-                        "yield": yield_val,
-                        "yield_units": "bushels",
-                        "land_area": land_area,
-                        "planted_area": planted_area,
-                        "area_units": "acres",
-                    }
-                    
-                    records_by_year[year].append(record)
-                    duplicate_candidates.append((year, record.copy()))
+    crop_rows = np.repeat(crop_idx, parcel_counts)
+    yield_bounds = np.array([YIELD_RANGES[crop] for crop in CROPS], dtype=float)
+    land_area, planted_area, yield_val = synthesize_parcels(
+        rng, num_rows, yield_bounds[crop_rows, 0], yield_bounds[crop_rows, 1]
+    )
+    parcel_ids = rng.integers(0, 1 << 32, num_rows, dtype=np.uint32)
+    
+    columns = {
+        "crop_name": crop_rows,
+        "land_id": np.array(
+            [f"PARCEL-{parcel_id:08X}" for parcel_id in parcel_ids.tolist()],
+            dtype=object,
+        ),
+        "fips_cd": np.repeat(fips_idx, parcel_counts),
+        "yield": yield_val,
+        "yield_units": np.zeros(num_rows, dtype=np.int8),
+        "land_area": land_area,
+        "planted_area": planted_area,
+        "area_units": np.zeros(num_rows, dtype=np.int8),
+        "harvest_year": np.repeat(
+            np.array(YEARS, dtype=np.int32)[year_idx], parcel_counts
+        ),
+    }
+    year_rows = {
+        year: np.flatnonzero(columns["harvest_year"] == year) for year in YEARS
+    }
     
     # === INJECT DATA QUALITY ISSUES ===
     
-    # Issue 1: Null values (5 records with null yield)
+    yields = columns["yield"]
+    
+    # Issue 1: Null values (2 records with null yield per year)
     for year in YEARS:
-        if records_by_year[year]:
-            for _ in range(2):
-                idx = random.randint(0, len(records_by_year[year]) - 1)
-                records_by_year[year][idx]["yield"] = None
+        null_idx = rng.choice(year_rows[year], 2, replace=False)
+        yields[null_idx] = np.nan
     
-    # Issue 2: Negative yields (4 records)
-    negative_count = 0
+    # Issue 2: Negative yields (1 non-null record per year)
     for year in YEARS:
-        if records_by_year[year] and negative_count < 4:
-            idx = random.randint(0, len(records_by_year[year]) - 1)
-            if records_by_year[year][idx]["yield"] is not None:
-                records_by_year[year][idx]["yield"] = round(random.uniform(-50, -10), 2)
-                negative_count += 1
+        rows = year_rows[year]
+        neg_idx = rng.choice(rows[~np.isnan(yields[rows])], 1, replace=False)
+        yields[neg_idx] = np.round(rng.uniform(-50, -10, len(neg_idx)), 2)
     
     # Issue 3: Duplicate primary keys (3 duplicates)
-    for _ in range(3):
-        year, record = random.choice(duplicate_candidates)
-        # Modify some non-key fields to make it a "different" record with same PK
-        dup_record = record.copy()
-        dup_record["yield"] = round(record["yield"] * random.uniform(0.9, 1.1), 2) if record["yield"] else None
-        dup_record["planted_area"] = round(record["planted_area"] * random.uniform(0.95, 1.05), 2)
-        records_by_year[year].append(dup_record)
+    dup_rows = [rng.choice(year_rows[year]) for year in rng.choice(YEARS, 3).tolist()]
+    dups = {field: values[dup_rows] for field, values in columns.items()}
+    # Modify some non-key fields to make it a "different" record with same PK
+    dups["yield"] = np.round(dups["yield"] * rng.uniform(0.9, 1.1, len(dup_rows)), 2)
+    dups["planted_area"] = np.round(
+        dups["planted_area"] * rng.uniform(0.95, 1.05, len(dup_rows)), 2
+    )
+    for field, values in columns.items():
+        columns[field] = np.concatenate([values, dups[field]])
     
-    return records_by_year
+    return columns
 
 
 def generate_abandonment_data():
     """Generate county crop abandonment data with intentional quality issues."""
-    records_by_year = {year: [] for year in YEARS}
+    columns = {
+        field: [] for field in ABANDONMENT_SCHEMA.names + [HARVEST_YEAR_FIELD.name]
+    }
     
     # Track which county we'll skip for referential integrity test
-    missing_county_year = random.choice(YEARS)
-    missing_county_fips = random.choice(FIPS_CODES)
-    missing_crop = random.choice(CROPS)
+    missing_county_year = _rng.choice(YEARS)
+    missing_county_fips = _rng.choice(FIPS_CODES)
+    missing_crop = _rng.choice(CROPS)
+    
+    crop_ranges = [(crop, *ABANDONMENT_RANGES[crop]) for crop in CROPS]
+    uniform = _rng.uniform  # Bound once so the loop below uses a fast local
     
     for year in YEARS:
-        for fips_cd in FIPS_CODES:
-            for crop in CROPS:
+        for i, fips_cd in enumerate(FIPS_CODES):
+            for j, (crop, pct_low, pct_high) in enumerate(crop_ranges):
                 # Issue 4: Missing county record (referential integrity)
                 if (year == missing_county_year and 
                     fips_cd == missing_county_fips and 
@@ -120,69 +186,98 @@ def generate_abandonment_data():
                           f"year={year}, fips={fips_cd}, crop={crop}")
                     continue
                 
-                abandonment_range = ABANDONMENT_RANGES[crop]
-                abandonment_pct = round(random.uniform(*abandonment_range), 2)
+                abandonment_pct = uniform_hundredths(pct_low, pct_high)
                 
                 # Calculate a plausible abandoned area based on typical county size
-                avg_county_planted = random.uniform(5000, 20000)
+                avg_county_planted = uniform(5000, 20000)
                 abandoned_area = round(avg_county_planted * (abandonment_pct / 100), 2)
                 
-                record = {
-                    "crop_name": crop,
-                    "fips_cd": fips_cd,
-                    "abandoned_area": abandoned_area,
-                    "abandonment_percent": abandonment_pct,
-                }
-                
-                records_by_year[year].append(record)
+                columns["crop_name"].append(j)
+                columns["fips_cd"].append(i)
+                columns["abandoned_area"].append(abandoned_area)
+                columns["abandonment_percent"].append(abandonment_pct)
+                columns["harvest_year"].append(year)
+    
+    year_rows = {year: [] for year in YEARS}
+    for idx, year in enumerate(columns["harvest_year"]):
+        year_rows[year].append(idx)
     
     # Issue 5: Abandonment percent > 100 (2 records)
-    for year in random.sample(YEARS, 2):
-        if records_by_year[year]:
-            idx = random.randint(0, len(records_by_year[year]) - 1)
-            records_by_year[year][idx]["abandonment_percent"] = round(
-                random.uniform(105, 150), 2
-            )
+    for year in _rng.sample(YEARS, 2):
+        if year_rows[year]:
+            idx = _rng.choice(year_rows[year])
+            columns["abandonment_percent"][idx] = uniform_hundredths(105, 150)
             print(f"  [Quality Issue] Set abandonment > 100% for record in year {year}")
     
     # Issue 6: Duplicate primary key in abandonment (2 duplicates)
-    for year in random.sample(YEARS, 2):
-        if records_by_year[year]:
-            original = random.choice(records_by_year[year])
-            dup_record = original.copy()
+    for year in _rng.sample(YEARS, 2):
+        if year_rows[year]:
+            idx = _rng.choice(year_rows[year])
+            dup_record = {field: values[idx] for field, values in columns.items()}
             dup_record["abandonment_percent"] = round(
-                original["abandonment_percent"] * random.uniform(0.8, 1.2), 2
+                dup_record["abandonment_percent"] * _rng.uniform(0.8, 1.2), 2
             )
-            records_by_year[year].append(dup_record)
+            for field, value in dup_record.items():
+                columns[field].append(value)
             print(f"  [Quality Issue] Added duplicate abandonment PK in year {year}")
     
-    return records_by_year
-
-
-def save_partitioned_parquet(records_by_year, base_path, schema_fields):
-    """Save data as year-partitioned Parquet files."""
-    os.makedirs(base_path, exist_ok=True)
-    
-    for year, records in records_by_year.items():
-        if not records:
-            continue
-            
-        partition_path = os.path.join(base_path, f"harvest_year={year}")
-        os.makedirs(partition_path, exist_ok=True)
-        
-        # Build PyArrow table
-        columns = {field: [] for field in schema_fields}
-        
-        for record in records:
-            for field in schema_fields:
-                columns[field].append(record.get(field))
-        
-        table = pa.table(columns)
-        
-        file_path = os.path.join(partition_path, "data.parquet")
-        pq.write_table(table, file_path)
-        
-        print(f"  Written {len(records)} records to {file_path}")
+    return columns
+
+
+def column_array(values, field):
+    """Build an Arrow array for one column from indices or raw values."""
+    if pa.types.is_dictionary(field.type):
+        return pa.DictionaryArray.from_arrays(
+            pa.array(values, type=field.type.index_type),
+            pa.array(DICTIONARY_VALUES[field.name], type=field.type.value_type),
+        )
+    if pa.types.is_floating(field.type):
+        values = np.asarray(values, dtype=field.type.to_pandas_dtype())
+    return pa.array(values, type=field.type, from_pandas=True)
+
+
+def iter_record_batches(columns, schema):
+    """Lazily yield the columns as record batches of at most ROW_GROUP_ROWS rows."""
+    num_rows = len(columns[schema.names[0]])
+    for start in range(0, num_rows, ROW_GROUP_ROWS):
+        stop = start + ROW_GROUP_ROWS
+        yield pa.RecordBatch.from_arrays(
+            [column_array(columns[field.name][start:stop], field) for field in schema],
+            schema=schema,
+        )
+
+
+def save_partitioned_parquet(columns, base_path, schema):
+    """Save columns as a harvest_year-partitioned Parquet dataset.
+
+    NaN in a float column is written as null.
+    """
+    full_schema = schema.append(HARVEST_YEAR_FIELD)
+    reader = pa.RecordBatchReader.from_batches(
+        full_schema, iter_record_batches(columns, full_schema)
+    )
+    file_options = ds.ParquetFileFormat().make_write_options(
+        use_dictionary=[name for name in schema.names if name in DICTIONARY_VALUES],
+        **PARQUET_WRITE_OPTIONS,
+    )
+    
+    written_files = []
+    ds.write_dataset(
+        reader,
+        base_path,
+        format="parquet",
+        partitioning=HARVEST_YEAR_PARTITIONING,
+        file_options=file_options,
+        basename_template="data-{i}.parquet",
+        max_rows_per_file=MAX_ROWS_PER_FILE,
+        max_rows_per_group=ROW_GROUP_ROWS,
+        existing_data_behavior="delete_matching",
+        use_threads=True,
+        file_visitor=written_files.append,
+    )
+    
+    for written in sorted(written_files, key=lambda f: f.path):
+        print(f"  Written {written.metadata.num_rows} records to {written.path}")
 
 
 def main():
@@ -196,31 +291,24 @@ def main():
     # Generate crop yield data
     print("\nGenerating crop yield data...")
     yield_data = generate_crop_yield_data()
-    yield_fields = [
-        "crop_name", "land_id", "fips_cd", "yield", 
-        "yield_units", "land_area", "planted_area", "area_units"
-    ]
     save_partitioned_parquet(
         yield_data, 
         os.path.join(data_dir, "crop_yield"),
-        yield_fields
+        YIELD_SCHEMA
     )
     
     # Generate abandonment data
     print("\nGenerating county crop abandonment data...")
     abandonment_data = generate_abandonment_data()
-    abandonment_fields = [
-        "crop_name", "fips_cd", "abandoned_area", "abandonment_percent"
-    ]
     save_partitioned_parquet(
         abandonment_data,
         os.path.join(data_dir, "county_crop_abandonment"),
-        abandonment_fields
+        ABANDONMENT_SCHEMA
     )
     
     # Summary
-    total_yield = sum(len(r) for r in yield_data.values())
-    total_abandonment = sum(len(r) for r in abandonment_data.values())
+    total_yield = len(yield_data["harvest_year"])
+    total_abandonment = len(abandonment_data["harvest_year"])
     
     print("\n" + "=" * 60)
     print("Data Generation Complete!")
@@ -3,6 +3,9 @@ Quick verification that PySpark is working correctly.
 Run this first to confirm your environment is ready.
 """
 
+from pathlib import Path
+
+import pyarrow.parquet as pq
 from pyspark.sql import SparkSession
 
 def main():
@@ -27,8 +30,14 @@ def main():
     # Verify parquet reading
     try:
         yield_df = spark.read.parquet("data/crop_yield")
-        count = yield_df.count()
-        print(f"✓ Parquet data loaded: {count} crop yield records")
+        # Row counts come from the memory-mapped Parquet footers, avoiding a
+        # full Spark scan and any read() copies into process buffers
+        count = sum(
+            pq.read_metadata(path, memory_map=True).num_rows
+            for path in Path("data/crop_yield").rglob("*.parquet")
+        )
+        print(f"✓ Parquet data loaded: {count} crop yield records, "
+              f"{len(yield_df.columns)} columns")
     except Exception as e:
         print(f"✗ Could not read parquet data: {e}")
         print("  Run 'python generate_data.py' first if data is missing")